@@ -0,0 +1,189 @@
+"""Micro-benchmarks of CPU-heavy parsers over page fixtures from `benchmarks/fixtures`.
+
+Fixtures are synthetic, not captured responses. They follow the markup the parsers
+look for (listing rows, brand facets, category tree, `price/missing` JSON) with made up
+product codes, brands and prices, and the listing page is padded with inline script
+to the weight of a real page. Results counter isn't included, since its markup wasn't
+checked against the site. Replace them with saved pages when timings should match production.
+
+Runs without network access:
+
+    python -m benchmarks.parsers --update-baseline   # store current results as baseline
+    python -m benchmarks.parsers                     # compare with baseline
+
+Baseline depends on hardware, so it should be recorded on the machine it's compared on.
+Exits with code 1 when baseline is missing or throughput or peak memory of any parser
+regressed beyond threshold.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+from src.attributes import DescriptionTable
+from src.brands import parse_brands_from_soup
+from src.item_parsing import parse_items_from_soup
+from src.prices import parse_prices_from_response
+from src.subcategories_parsing import parse_subcategories_from_soup
+from src.utils import prettify_description
+
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, 'fixtures')
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+
+
+def read_fixture(filename: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, filename), 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def get_benchmarks() -> dict:
+    """Returns benchmark name mapped to a callable and count of parsed units per call."""
+    loop = asyncio.new_event_loop()
+    listing_html = read_fixture('listing_page.html')
+    listing_soup = BeautifulSoup(listing_html, 'lxml')
+    facets_soup = BeautifulSoup(read_fixture('facet_list.html'), 'lxml')
+    tree_soup = BeautifulSoup(read_fixture('subcategories_tree.html'), 'lxml')
+    prices_response = read_fixture('prices.json')
+    descriptions = [element.text for element in listing_soup.find_all(class_='productfeaturesinline')]
+    description_table = DescriptionTable()
+
+    return {
+        'listing_page_soup': (lambda: BeautifulSoup(listing_html, 'lxml'), 1),
+        'parse_items_from_soup': (lambda: loop.run_until_complete(parse_items_from_soup(listing_soup)),
+                                  len(listing_soup.find_all('tbody', class_='listingcollapsed__item'))),
+        'parse_brands_from_soup': (lambda: parse_brands_from_soup(facets_soup),
+                                   len(facets_soup.find_all('label', class_='facetnav__listitem'))),
+        'parse_subcategories_from_soup': (lambda: parse_subcategories_from_soup(tree_soup),
+                                          len(tree_soup.find_all('div', class_='categoriestree__subcategory'))),
+        'parse_prices_from_response': (lambda: parse_prices_from_response(prices_response),
+                                       len(json.loads(prices_response)['prices'])),
+        'prettify_description': (lambda: [prettify_description(description) for description in descriptions],
+                                 len(descriptions)),
+        'description_table': (lambda: [description_table.add(str(i), description) for i, description in enumerate(descriptions)],
+                              len(descriptions)),
+    }
+
+
+def measure_time(function, min_time: float, repeat: int) -> float:
+    """Returns the best seconds per call out of `repeat` rounds lasting at least `min_time` each."""
+    calls = 1
+    while True:
+        started_at = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - started_at
+        if elapsed >= min_time:
+            break
+        calls *= 2
+
+    best = elapsed / calls
+    for _ in range(repeat - 1):
+        started_at = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, (time.perf_counter() - started_at) / calls)
+    return best
+
+
+def measure_allocations(function) -> tuple:
+    """Returns peak traced memory in KiB and count of memory blocks left allocated by a single call."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = function()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    del result
+    return round(peak / 1024, 1), blocks
+
+
+def run_benchmarks(names: list, min_time: float, repeat: int) -> dict:
+    results = {}
+    for name, (function, units) in get_benchmarks().items():
+        if names and name not in names:
+            continue
+        seconds = measure_time(function, min_time, repeat)
+        peak_kib, blocks = measure_allocations(function)
+        results[name] = {
+            'calls_per_second': round(1 / seconds, 2),
+            'units_per_second': round(units / seconds, 2),
+            'peak_kib': peak_kib,
+            'allocated_blocks': blocks,
+        }
+    return results
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]
+        if result['calls_per_second'] < expected['calls_per_second'] * (1 - threshold):
+            regressions.append(f'{name}: throughput {result["calls_per_second"]} calls/s, '
+                               f'baseline {expected["calls_per_second"]} calls/s')
+        if result['peak_kib'] > expected['peak_kib'] * (1 + threshold):
+            regressions.append(f'{name}: peak memory {result["peak_kib"]} KiB, baseline {expected["peak_kib"]} KiB')
+    return regressions
+
+
+def print_results(results: dict, baseline: dict) -> None:
+    print(f'{"benchmark":<32}{"calls/s":>12}{"units/s":>14}{"peak KiB":>11}{"blocks":>9}{"vs baseline":>13}')
+    for name, result in results.items():
+        change = ''
+        if name in baseline:
+            change = f'{(result["calls_per_second"] / baseline[name]["calls_per_second"] - 1) * 100:+.1f}%'
+        print(f'{name:<32}{result["calls_per_second"]:>12}{result["units_per_second"]:>14}'
+              f'{result["peak_kib"]:>11}{result["allocated_blocks"]:>9}{change:>13}')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark parsers over page fixtures')
+    parser.add_argument('names', nargs='*', help='Benchmarks to run. All if not specified')
+    parser.add_argument('-t', '--threshold', type=float, default=0.2,
+                        help='Allowed relative regression compared to baseline')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Rounds per benchmark, the best one is taken')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds per round')
+    parser.add_argument('--baseline', type=str, default=BASELINE_PATH, help='Path to baseline file')
+    parser.add_argument('--update-baseline', action='store_true', help='Store results as new baseline')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+
+    results = run_benchmarks(args.names, args.min_time, args.repeat)
+    print_results(results, baseline)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump({**baseline, **results}, file, indent=4, sort_keys=True)
+        print(f'[+] Baseline saved to {args.baseline}')
+        return
+
+    if not baseline:
+        print(f'[!] No baseline found at {args.baseline}. Run with --update-baseline to create it')
+        sys.exit(1)
+
+    regressions = find_regressions(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f'[!] Regression: {regression}')
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Startup time benchmark of the CLI.
+
+Measures wall time of fresh interpreters importing `main` and running light commands,
+and lists the most expensive imports reported by `python -X importtime`:
+
+    python -m benchmarks.startup                     # compare with baseline
+    python -m benchmarks.startup --update-baseline   # store current results as baseline
+
+Exits with code 1 when baseline is missing or any scenario got slower than baseline beyond threshold.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BENCHMARKS_DIR)
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, 'startup_baseline.json')
+
+SCENARIOS = {
+    'interpreter': ['-c', 'pass'],
+    'import_main': ['-c', 'import main'],
+    'help': ['main.py', '--help'],
+    'diff_help': ['main.py', 'diff', '--help'],
+    'catalog_help': ['main.py', 'catalog', '--help'],
+}
+
+
+def measure_scenario(arguments: list, repeat: int) -> float:
+    """Returns median wall time in milliseconds of running interpreter with `arguments`."""
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        subprocess.run([sys.executable, *arguments], cwd=BASE_DIR, stdout=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return round(statistics.median(timings), 1)
+
+
+def get_slowest_imports(module: str, limit: int) -> list:
+    """Returns modules with the highest cumulative import time in microseconds."""
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                             cwd=BASE_DIR, capture_output=True, text=True, check=True)
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:limit]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark CLI startup time')
+    parser.add_argument('-t', '--threshold', type=float, default=0.3,
+                        help='Allowed relative regression compared to baseline')
+    parser.add_argument('-r', '--repeat', type=int, default=7, help='Runs per scenario, the median one is taken')
+    parser.add_argument('--imports', type=int, default=15, help='Count of the slowest imports of `main` to show')
+    parser.add_argument('--baseline', type=str, default=BASELINE_PATH, help='Path to baseline file')
+    parser.add_argument('--update-baseline', action='store_true', help='Store results as new baseline')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+
+    results = {name: measure_scenario(arguments, args.repeat) for name, arguments in SCENARIOS.items()}
+
+    print(f'{"scenario":<16}{"ms":>10}{"vs baseline":>13}')
+    for name, milliseconds in results.items():
+        change = f'{(milliseconds / baseline[name] - 1) * 100:+.1f}%' if name in baseline else ''
+        print(f'{name:<16}{milliseconds:>10}{change:>13}')
+
+    print(f'\nSlowest imports of `main` (cumulative, ms):')
+    for microseconds, name in get_slowest_imports('main', args.imports):
+        print(f'{microseconds / 1000:>10.1f}  {name}')
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=4, sort_keys=True)
+        print(f'[+] Baseline saved to {args.baseline}')
+        return
+
+    if not baseline:
+        print(f'[!] No baseline found at {args.baseline}. Run with --update-baseline to create it')
+        sys.exit(1)
+
+    # Interpreter startup only calibrates the machine and is not checked
+    regressions = [name for name, milliseconds in results.items()
+                   if name in baseline and name != 'interpreter' and milliseconds > baseline[name] * (1 + args.threshold)]
+    for name in regressions:
+        print(f'[!] Regression: {name} takes {results[name]} ms, baseline {baseline[name]} ms')
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,77 +1,81 @@
 import os
+import sys
 import asyncio
-import pandas as pd
 import argparse
 import logging
 
-from aiohttp_retry import ExponentialRetry, RetryClient
-from aiohttp import ClientError, ClientOSError
-from src.selenium import get_authorized_session, install_geckodriver
-from src.urls import create_aiohttp_session
-from src.subcategories_parsing import get_subcategories_URLs
-from src.item_parsing import gather_data
-from src.google_sheets import get_sheet_as_dataframe_or_load_from_storage, get_category_ids
-from src.settings import RESULTS_DIR, PREFIXES_SHEET, DELIVERY_SHEET, LOGS_DIR
-from datetime import datetime
+from src.settings import RESULTS_DIR, LOGS_DIR, RATE_LIMITS, LOGIN_BACKENDS, DESCRIPTION_FORMATS
+from src.utils import get_or_create_dir
+from src.profiling import configure_profiler, stage, STAGES, PROFILERS, RUN_STAGE
+from src.catalog import CATALOG_PATH, DESCRIPTION_FORMAT as CATALOG_DESCRIPTION_FORMAT, add_catalog_arguments, run_catalog_command
 
+# Heavy dependencies (selenium, pandas, gspread, bs4, aiohttp) are imported inside
+# the commands that use them, so light commands start fast
 
-RETRY_OPTIONS = ExponentialRetry(
-    attempts=5,
-    statuses=(500, 502, 503, 504),
-    exceptions=(ClientError, ClientOSError)
-)
+COMMANDS = ('crawl', 'prices', 'diff', 'catalog')
 
-error_handler = logging.FileHandler(os.path.join(LOGS_DIR, 'error.log'))
-error_handler.setLevel(logging.ERROR)
+logger = logging.getLogger(__file__)
 
-warning_handler = logging.FileHandler(os.path.join(LOGS_DIR, 'logs.log'))
-warning_handler.setLevel(logging.WARNING)
 
-logging.basicConfig(handlers=[error_handler, warning_handler], format='%(asctime)s - %(name)s - %(levelname)s : %(message)s')
-logger = logging.getLogger(__file__)
+def setup_logging():
+    get_or_create_dir(LOGS_DIR)
+    error_handler = logging.FileHandler(os.path.join(LOGS_DIR, 'error.log'))
+    error_handler.setLevel(logging.ERROR)
 
-def get_mapping(sheetname: str):
-    df = get_sheet_as_dataframe_or_load_from_storage(sheetname)
-    return dict(zip(df[df.columns[0]].astype(str), df[df.columns[1]].astype(str)))
+    warning_handler = logging.FileHandler(os.path.join(LOGS_DIR, 'logs.log'))
+    warning_handler.setLevel(logging.WARNING)
 
+    logging.basicConfig(handlers=[error_handler, warning_handler], format='%(asctime)s - %(name)s - %(levelname)s : %(message)s')
 
-def remove_prefix(row, prefixes: dict):
-    if row['item_brand'] in prefixes:
-        prefix = prefixes[row['item_brand']]
-        return row['item_number'].replace(prefix, '')
-    else:
-        return row['item_number']
 
+def get_retry_options():
+    from aiohttp_retry import ExponentialRetry
+    from aiohttp import ClientError, ClientOSError
 
-def remove_prefixes_from_dataframe(df: pd.DataFrame):
-    prefixes = get_mapping(PREFIXES_SHEET)
-    df['item_number'] = df.apply(lambda x: remove_prefix(x, prefixes), axis=1)
-    return df
+    return ExponentialRetry(
+        attempts=5,
+        statuses=(500, 502, 503, 504),
+        exceptions=(ClientError, ClientOSError)
+    )
 
 
-def adjust_delivery_time(date: str, dates_mapping: dict):
-    if date in dates_mapping:
-        return dates_mapping[date]
-    return date
+def read_accounts_file(path: str) -> list:
+    credentials = []
+    with open(path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            username, password = line.split(':', 1)
+            credentials.append((username.strip(), password.strip()))
+    return credentials
 
 
-def adjust_delivery_time_in_dataframe(df: pd.DataFrame):
-    dates_mapping = get_mapping(DELIVERY_SHEET)
-    df['delivery_time'] = df['delivery_time'].apply(lambda x: adjust_delivery_time(x, dates_mapping))
-    return df
+def get_credentials(args) -> list:
+    credentials = []
+    if args.username and args.password:
+        credentials.append((args.username, args.password))
+    if args.accounts:
+        credentials += read_accounts_file(args.accounts)
+    # Without credentials authorization runs in manual mode
+    return credentials or [(None, None)]
 
 
-def write_result_to_file(df: pd.DataFrame):
-    directory = RESULTS_DIR
-    filename = f'{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.csv'
-    filepath = os.path.join(directory, filename)
-    pd.DataFrame(df).to_csv(filepath, index=False)
+def create_session_pool(args):
+    from src.session_pool import SessionPool
 
-    return filepath
+    print('[+] Authorizing...')
+    return SessionPool(get_credentials(args), get_retry_options(), args.login)
 
 
-def parse_args():
-    parser = argparse.ArgumentParser()
+def get_latest_result_path() -> str:
+    results = sorted(filename for filename in os.listdir(RESULTS_DIR) if filename.endswith('.csv'))
+    if not results:
+        raise FileNotFoundError(f'No results found in {RESULTS_DIR}')
+    return os.path.join(RESULTS_DIR, results[-1])
+
+
+def add_authorization_arguments(parser: argparse.ArgumentParser):
     parser.add_argument('-u', '--username', type=str, metavar='', default=os.environ.get('USERNAME'),
                         help='Username for website authorization. \
                             If not specified authorization will run in manual mode. \
@@ -82,45 +86,173 @@ def parse_args():
                             If not specified authorization will run in manual mode. \
                             Also can be specified by setting `PASSOWRD` env variable')
 
-    return parser.parse_args()
+    parser.add_argument('-a', '--accounts', type=str, metavar='', default=os.environ.get('ACCOUNTS_FILE'),
+                        help='Path to file with `username:password` per line. \
+                            Every account gets its own session and requests are spread across them. \
+                            Also can be specified by setting `ACCOUNTS_FILE` env variable')
 
+    parser.add_argument('-l', '--login', type=str, choices=LOGIN_BACKENDS, default=os.environ.get('LOGIN_BACKEND', 'auto'),
+                        help='Authorization backend. `auto` replays login with plain HTTP and falls back to browser \
+                            if it fails, `http` never starts browser, `browser` always uses Firefox. \
+                            Also can be specified by setting `LOGIN_BACKEND` env variable')
 
-async def main():
-    args = parse_args()
 
-    install_geckodriver()
-    print('[+] Authorizing...')
-    session = get_authorized_session(args.username, args.password)
-    session = create_aiohttp_session(session)
-    async with RetryClient(session, retry_options=RETRY_OPTIONS) as retry_client:
+def parse_args(argv: list):
+    # `crawl` stays default command, so `main.py -u ... -p ...` works as before
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv = ['crawl'] + argv
+
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    crawl_parser = subparsers.add_parser('crawl', help='Parse all items of categories from source table (default)')
+    add_authorization_arguments(crawl_parser)
+    crawl_parser.add_argument('-c', '--catalog', type=str, metavar='', nargs='?', const=CATALOG_PATH,
+                              help=f'Save results to catalog database with price history. \
+                                  Path defaults to {CATALOG_PATH}. Query it with `catalog` command')
+    crawl_parser.add_argument('-d', '--description-format', type=str, choices=DESCRIPTION_FORMATS, default='dict',
+                              help='How item description attributes are written: one cell with `dict` repr (default) \
+                                  or `json` map, or `wide` - a column per attribute')
+
+    profiling = crawl_parser.add_argument_group('profiling', f'Profiling results are stored in {LOGS_DIR}')
+    profiling.add_argument('--profile', type=str, choices=PROFILERS,
+                           help='Profile the run with cProfile (.prof) or sampling profiler (.folded)')
+    profiling.add_argument('--profile-stages', type=lambda value: value.split(','), default=[], metavar='',
+                           help=f'Comma separated stages to profile instead of the whole run: {", ".join(STAGES)}')
+    profiling.add_argument('--sampling-interval-ms', type=int, default=5, metavar='',
+                           help='Interval between samples of sampling profiler')
+    profiling.add_argument('--tracemalloc', action='store_true',
+                           help='Save tracemalloc snapshots at stage boundaries')
+    profiling.add_argument('--slow-callback-ms', type=int, metavar='',
+                           help='Log asyncio callbacks blocking the event loop longer than this')
+
+    prices_parser = subparsers.add_parser('prices', help='Refresh prices of items from previous result')
+    add_authorization_arguments(prices_parser)
+    prices_parser.add_argument('input', type=str, nargs='?',
+                               help='Result csv to refresh. The latest one from results directory if not specified')
+
+    diff_parser = subparsers.add_parser('diff', help='Compare two results by product code')
+    diff_parser.add_argument('old', type=str, help='Previous result csv')
+    diff_parser.add_argument('new', type=str, nargs='?', help='New result csv. The latest one if not specified')
+    diff_parser.add_argument('-o', '--output', type=str, metavar='', help='Write changes to csv instead of stdout')
+
+    catalog_parser = subparsers.add_parser('catalog', help='Query items catalog')
+    add_catalog_arguments(catalog_parser)
+
+    args = parser.parse_args(argv)
+    unknown_stages = set(getattr(args, 'profile_stages', [])) - set(STAGES)
+    if unknown_stages:
+        parser.error(f'unknown profile stages: {", ".join(unknown_stages)}')
+    return args
+
+
+async def crawl(args):
+    profiler = configure_profiler(profiler=args.profile, stages=args.profile_stages, trace_memory=args.tracemalloc,
+                                  slow_callback_ms=args.slow_callback_ms, sampling_interval_ms=args.sampling_interval_ms)
+    profiler.watch_slow_callbacks(asyncio.get_running_loop())
+
+    with stage(RUN_STAGE):
+        await parse(args)
+
+
+async def parse(args):
+    import pandas as pd
+    from src.subcategories_parsing import get_subcategories_URLs
+    from src.item_parsing import gather_data
+    from src.google_sheets import get_category_ids
+    from src.postprocessing import remove_prefixes_from_dataframe, adjust_delivery_time_in_dataframe, \
+        get_descriptions_table, add_descriptions_to_dataframe, write_result_to_file
+    from src.catalog import save_items_to_catalog
+
+    async with create_session_pool(args) as retry_client:
         category_ids = get_category_ids()
         print(f'[+] Got {len(category_ids)} categories from source table')
 
-        subcategories_urls = await get_subcategories_URLs(retry_client, category_ids)
+        with stage('subcategories'):
+            subcategories_urls = await get_subcategories_URLs(retry_client, category_ids)
         print(
             f'[+] Successfully got {len(subcategories_urls)} subcategoreis URL\'s')
 
         print('[+] Staring parsing')
         data = await gather_data(subcategories_urls, retry_client)
 
-        df = pd.DataFrame(data)
-        print('[+] Removing brands prefixes')
-        df = remove_prefixes_from_dataframe(df)
+        with stage('postprocessing'):
+            df = pd.DataFrame(data)
+            print('[+] Removing brands prefixes')
+            df = remove_prefixes_from_dataframe(df)
+
+            print('[+] Making delivery time adjustments')
+            df = adjust_delivery_time_in_dataframe(df)
+
+            print('[+] Adding item descriptions')
+            descriptions = get_descriptions_table(df)
+            result_df = add_descriptions_to_dataframe(df, descriptions, args.description_format)
 
-        print('[+] Making delivery time adjustments')
-        df = adjust_delivery_time_in_dataframe(df)
+            print('[+] Writing data to csv')
+            result_path = write_result_to_file(result_df)
 
-        print('[+] Writing data to csv')
-        result_path = write_result_to_file(df)
+            if args.catalog:
+                print('[+] Saving data to catalog')
+                catalog_df = add_descriptions_to_dataframe(df, descriptions, CATALOG_DESCRIPTION_FORMAT)
+                save_items_to_catalog(catalog_df.to_dict('records'), args.catalog)
 
         print(f'[+] Parsing complete! \n Result: {result_path}')
 
 
+async def refresh_prices(args):
+    import pandas as pd
+    from src.prices import get_item_prices_without_loss
+    from src.rate_limit import RateLimiter
+    from src.postprocessing import write_result_to_file
+
+    input_path = args.input or get_latest_result_path()
+    df = pd.read_csv(input_path, dtype={'product_code': str})
+    print(f'[+] Refreshing prices of {len(df)} items from {input_path}')
+
+    async with create_session_pool(args) as retry_client:
+        prices = await get_item_prices_without_loss(retry_client, df['product_code'].to_list(), RateLimiter(RATE_LIMITS))
+
+    df['price'] = df['product_code'].map({price.product_code: price.price for price in prices})
+    result_path = write_result_to_file(df)
+    print(f'[+] Prices refreshed! \n Result: {result_path}')
+
+
+def diff(args):
+    from src.results_diff import read_result, diff_results, write_diff
+
+    new_path = args.new or get_latest_result_path()
+    changes = diff_results(read_result(args.old), read_result(new_path))
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as file:
+            write_diff(changes, file)
+    else:
+        write_diff(changes, sys.stdout)
+
+    counts = {}
+    for change in changes:
+        counts[change['change']] = counts.get(change['change'], 0) + 1
+    print(f'[+] {args.old} -> {new_path}: ' + ', '.join(f'{count} {change}' for change, count in sorted(counts.items())), file=sys.stderr)
+
+
+def main(args):
+    if args.command == 'crawl':
+        asyncio.run(crawl(args))
+    elif args.command == 'prices':
+        asyncio.run(refresh_prices(args))
+    elif args.command == 'diff':
+        diff(args)
+    elif args.command == 'catalog':
+        run_catalog_command(args)
+
+
 if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    setup_logging()
     try:
-        print(f'Logs are storing in: {LOGS_DIR}')
-        print(f'Results are storing in {RESULTS_DIR}')
-        asyncio.run(main())
+        if args.command == 'crawl':
+            print(f'Logs are storing in: {LOGS_DIR}')
+            print(f'Results are storing in {RESULTS_DIR}')
+        main(args)
     except KeyboardInterrupt:
         pass
     except:
@@ -128,4 +260,5 @@ if __name__ == '__main__':
         print(f'[!] An error has accured. You can see traceback in {os.path.join(LOGS_DIR, "error.log")}')
         raise
     finally:
-        input('Press enter to leave')
\ No newline at end of file
+        if args.command == 'crawl':
+            input('Press enter to leave')
@@ -0,0 +1,72 @@
+import json
+import sys
+
+from typing import Dict, Iterable, List, Tuple
+from src.utils import split_description
+
+
+class AttributeVocabulary:
+    """Maps attribute names to integer IDs shared by all items."""
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def get_id(self, name: str) -> int:
+        attribute_id = self.ids.get(name)
+        if attribute_id is None:
+            attribute_id = self.ids[sys.intern(name)] = len(self.names)
+            self.names.append(sys.intern(name))
+        return attribute_id
+
+    def get_name(self, attribute_id: int) -> str:
+        return self.names[attribute_id]
+
+
+class DescriptionTable:
+    """Item description attributes stored column-wise.
+
+    Every attribute is a column mapping product code to value. Names and values are
+    interned, so repeated ones are stored once for all items. Order of attributes in
+    the source description is kept per item as a tuple of IDs shared by items with the same attributes.
+    """
+
+    def __init__(self) -> None:
+        self.vocabulary = AttributeVocabulary()
+        self.columns: Dict[int, Dict[str, str]] = {}
+        self.layouts: Dict[str, Tuple[int, ...]] = {}
+        self._shared_layouts: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+
+    def add(self, product_code: str, description: str) -> None:
+        for attribute_id in self.layouts.get(product_code, ()):
+            del self.columns[attribute_id][product_code]
+
+        attribute_ids = []
+        for title, value in split_description(description):
+            attribute_id = self.vocabulary.get_id(title)
+            self.columns.setdefault(attribute_id, {})[product_code] = sys.intern(value)
+            attribute_ids.append(attribute_id)
+        # Repeated title keeps its first position and the last value, as in `prettify_description`
+        layout = tuple(dict.fromkeys(attribute_ids))
+        self.layouts[product_code] = self._shared_layouts.setdefault(layout, layout)
+
+    def get(self, product_code: str) -> dict | None:
+        layout = self.layouts.get(product_code)
+        if layout is None:
+            return None
+        return {self.vocabulary.get_name(attribute_id): self.columns[attribute_id][product_code] for attribute_id in layout}
+
+    def to_rows(self, product_codes: Iterable[str]) -> List[dict | None]:
+        """Returns description dict per product code, `None` for items without description."""
+        return [self.get(product_code) for product_code in product_codes]
+
+    def to_columns(self, product_codes: Iterable[str]) -> Dict[str, List[str | None]]:
+        """Returns attribute name mapped to values aligned with `product_codes`."""
+        product_codes = list(product_codes)
+        return {self.vocabulary.get_name(attribute_id): [column.get(product_code) for product_code in product_codes]
+                for attribute_id, column in self.columns.items() if column}
+
+    def serialize(self, product_codes: Iterable[str], description_format: str) -> List[str | None]:
+        """Returns description per product code as one cell: `dict` repr (the previous format) or `json` map."""
+        dump = str if description_format == 'dict' else lambda row: json.dumps(row, ensure_ascii=False)
+        return [dump(row) if row is not None else None for row in self.to_rows(product_codes)]
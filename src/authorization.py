@@ -0,0 +1,38 @@
+import logging
+import requests
+import threading
+
+from src import http_login
+
+
+logger = logging.getLogger(__name__)
+_geckodriver_lock = threading.Lock()
+
+
+def get_authorized_session_with_browser(username: str | None, password: str | None) -> requests.Session:
+    # Selenium is imported only when browser is really needed
+    from src.selenium import get_authorized_session, install_geckodriver
+
+    with _geckodriver_lock:
+        install_geckodriver()
+    return get_authorized_session(username, password)
+
+
+def get_authorized_session(username: str | None = None, password: str | None = None, backend: str = 'auto') -> requests.Session:
+    """Authorizes with plain HTTP and falls back to browser if login flow can't be replayed.
+
+    Manual authorization (no credentials) always runs in browser.
+    """
+    credentials = all((username, password))
+    if backend != 'browser' and credentials:
+        try:
+            return http_login.get_authorized_session(username, password)
+        except (http_login.BrowserlessLoginError, requests.RequestException) as e:
+            if backend == 'http':
+                raise
+            logger.warning(f'Browserless authorization of {username} failed: {e}. Falling back to browser')
+            print('[!] Browserless authorization failed. Falling back to browser')
+
+    if backend == 'http':
+        raise http_login.BrowserlessLoginError('Manual authorization requires browser')
+    return get_authorized_session_with_browser(username, password)
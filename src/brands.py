@@ -2,9 +2,13 @@ import aiohttp
 
 from typing import Iterable, List
 from src.models import BrandFilter, Brand
+from src.rate_limit import RateLimiter, FACETS_ENDPOINT
 from src.urls import async_get_soup_from_url, add_query_params, get_query_params, strip_query_params
 from bs4 import BeautifulSoup, Tag
 
+# Site doesn't show more items than this for a single search query
+ITEMS_COUNTER_LIMIT = 2500
+
 
 def create_url_for_missing_brands(category_page_url: str) -> str:
     API_url = 'https://md.e-cat.intercars.eu/ru/fragments/category/facet/list?facetCode=productBrandCode'
@@ -27,7 +31,7 @@ def group_brands_into_filters_up_to_item_counter_limit(brands_list: Iterable[Bra
     current_sum = 0
 
     for brand in brands_list:
-        if current_sum + brand.items_count > 2500:
+        if current_sum + brand.items_count > ITEMS_COUNTER_LIMIT:
             filters.append(current_filter)
             current_filter = BrandFilter()
             current_sum = 0
@@ -55,8 +59,9 @@ def parse_brands_from_soup(soup: BeautifulSoup) -> List[Brand]:
     return brands_list
 
 
-async def parse_preloaded_brands_forom_page(session: aiohttp.ClientSession, url: str) -> List[Brand]:
-    soup = await async_get_soup_from_url(session, url)
+async def parse_preloaded_brands_forom_page(session: aiohttp.ClientSession, url: str, limiter: RateLimiter) -> List[Brand]:
+    async with limiter.limit(FACETS_ENDPOINT):
+        soup = await async_get_soup_from_url(session, url)
     try:
         nav_elemnt_with_brands_options = next(el for el in soup.find_all(
             'div', class_='facetnav__name') if el.get_text(strip=True).lower() == 'производитель').parent
@@ -65,16 +70,17 @@ async def parse_preloaded_brands_forom_page(session: aiohttp.ClientSession, url:
     return parse_brands_from_soup(nav_elemnt_with_brands_options)
 
 
-async def get_missing_brands(session: aiohttp.ClientSession, category_page_url: str) -> List[Brand]:
+async def get_missing_brands(session: aiohttp.ClientSession, category_page_url: str, limiter: RateLimiter) -> List[Brand]:
     API_missing_brands_url = create_url_for_missing_brands(category_page_url)
-    soup = await async_get_soup_from_url(session, API_missing_brands_url)
+    async with limiter.limit(FACETS_ENDPOINT):
+        soup = await async_get_soup_from_url(session, API_missing_brands_url)
     brands_lsit = parse_brands_from_soup(soup)
     return brands_lsit
 
 
-async def parse_brands_from_url(session: aiohttp.ClientSession, url):
+async def parse_brands_from_url(session: aiohttp.ClientSession, url, limiter: RateLimiter):
     brands_list = []
-    brands_list += await parse_preloaded_brands_forom_page(session, url)
-    brands_list += await get_missing_brands(session, url)
+    brands_list += await parse_preloaded_brands_forom_page(session, url, limiter)
+    brands_list += await get_missing_brands(session, url, limiter)
 
     return brands_list
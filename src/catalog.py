@@ -0,0 +1,203 @@
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+
+from datetime import datetime
+from typing import Iterable, List
+from src.settings import STORAGE_DIR
+from src.utils import divide_chunks, get_or_create_dir
+
+
+CATALOG_PATH = os.environ.get('CATALOG_PATH', os.path.join(STORAGE_DIR, 'catalog.sqlite3'))
+
+# Columns of result csv in the same order
+ITEM_COLUMNS = ['item_number', 'item_name', 'item_brand', 'product_code', 'delivery_time',
+                'stock_info', 'item_description', 'image_url', 'currency', 'price']
+
+HISTORY_COLUMNS = ['started_at', 'price', 'stock_info', 'delivery_time']
+VANISHED_COLUMNS = ['product_code', 'item_number', 'item_brand', 'item_name', 'last_seen_run']
+
+UPSERT_BATCH_SIZE = 1000
+
+# Descriptions are stored in the default result csv format whatever format the run writes,
+# so `export` reproduces today's csv and wide attribute columns don't leak into the store
+DESCRIPTION_FORMAT = 'dict'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    items_count INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS items (
+    product_code TEXT PRIMARY KEY,
+    item_number TEXT,
+    item_name TEXT,
+    item_brand TEXT,
+    delivery_time TEXT,
+    stock_info TEXT,
+    item_description TEXT,
+    image_url TEXT,
+    currency TEXT,
+    price REAL,
+    first_seen_run INTEGER NOT NULL,
+    last_seen_run INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS items_last_seen_run ON items (last_seen_run);
+
+-- Row is stored only when price, stock or delivery time of the item changed
+CREATE TABLE IF NOT EXISTS price_history (
+    product_code TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    price REAL,
+    stock_info TEXT,
+    delivery_time TEXT,
+    PRIMARY KEY (product_code, run_id)
+) WITHOUT ROWID;
+'''
+
+INSERT_HISTORY_QUERY = '''
+INSERT OR REPLACE INTO price_history (product_code, run_id, price, stock_info, delivery_time)
+SELECT :product_code, :run_id, :price, :stock_info, :delivery_time
+WHERE NOT EXISTS (
+    SELECT 1 FROM items
+    WHERE product_code = :product_code AND price IS :price
+      AND stock_info IS :stock_info AND delivery_time IS :delivery_time
+)
+'''
+
+UPSERT_ITEM_QUERY = f'''
+INSERT INTO items ({', '.join(ITEM_COLUMNS)}, first_seen_run, last_seen_run)
+VALUES ({', '.join(':' + column for column in ITEM_COLUMNS)}, :run_id, :run_id)
+ON CONFLICT (product_code) DO UPDATE SET
+    {', '.join(f'{column} = excluded.{column}' for column in ITEM_COLUMNS if column != 'product_code')},
+    last_seen_run = excluded.last_seen_run
+'''
+
+
+def clean_value(value):
+    # NaN from pandas and nested values are stored the same way they are written to csv
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, (dict, list)):
+        return str(value)
+    return value
+
+
+class Catalog:
+    """Persistent store of parsed items with history of price and stock changes."""
+
+    def __init__(self, path: str = CATALOG_PATH) -> None:
+        self.path = path
+        get_or_create_dir(os.path.dirname(os.path.abspath(path)))
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> 'Catalog':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def start_run(self) -> int:
+        with self.connection:
+            cursor = self.connection.execute('INSERT INTO runs (started_at) VALUES (?)', (datetime.now().isoformat(),))
+        return cursor.lastrowid
+
+    def finish_run(self, run_id: int) -> None:
+        with self.connection:
+            self.connection.execute(
+                'UPDATE runs SET finished_at = ?, items_count = (SELECT COUNT(*) FROM items WHERE last_seen_run = ?) WHERE run_id = ?',
+                (datetime.now().isoformat(), run_id, run_id))
+
+    def get_latest_run(self) -> int | None:
+        row = self.connection.execute('SELECT MAX(run_id) FROM runs WHERE finished_at IS NOT NULL').fetchone()
+        return row[0]
+
+    def upsert_items(self, run_id: int, items: Iterable[dict]) -> None:
+        rows = [{**{column: clean_value(item.get(column)) for column in ITEM_COLUMNS}, 'run_id': run_id} for item in items]
+        for batch in divide_chunks(rows, UPSERT_BATCH_SIZE):
+            with self.connection:
+                # History goes first, as it's compared against previous state of items
+                self.connection.executemany(INSERT_HISTORY_QUERY, batch)
+                self.connection.executemany(UPSERT_ITEM_QUERY, batch)
+
+    def get_items(self, run_id: int) -> List[sqlite3.Row]:
+        return self.connection.execute(
+            f'SELECT {", ".join(ITEM_COLUMNS)} FROM items WHERE last_seen_run = ?', (run_id,)).fetchall()
+
+    def get_vanished_items(self, run_id: int) -> List[sqlite3.Row]:
+        """Returns items that were seen before `run_id` but not in it."""
+        return self.connection.execute(
+            f'SELECT {", ".join(VANISHED_COLUMNS)} FROM items WHERE last_seen_run < ?', (run_id,)).fetchall()
+
+    def get_price_history(self, product_code: str) -> List[sqlite3.Row]:
+        return self.connection.execute(
+            f'SELECT {", ".join(HISTORY_COLUMNS)} FROM price_history JOIN runs USING (run_id) '
+            'WHERE product_code = ? ORDER BY run_id',
+            (product_code,)).fetchall()
+
+
+def save_items_to_catalog(items: Iterable[dict], path: str = CATALOG_PATH) -> int:
+    """Upserts final rows of a run. Rows are final only after prices and postprocessing, as history compares them."""
+    with Catalog(path) as catalog:
+        run_id = catalog.start_run()
+        catalog.upsert_items(run_id, items)
+        catalog.finish_run(run_id)
+    return run_id
+
+
+def write_rows_to_csv(rows: Iterable[sqlite3.Row], columns: List[str], file) -> None:
+    writer = csv.writer(file)
+    writer.writerow(columns)
+    writer.writerows(rows)
+
+
+def export_items(catalog: Catalog, output: str | None) -> None:
+    rows = catalog.get_items(catalog.get_latest_run())
+    if output is None:
+        write_rows_to_csv(rows, ITEM_COLUMNS, sys.stdout)
+        return
+    with open(output, 'w', newline='', encoding='utf-8') as file:
+        write_rows_to_csv(rows, ITEM_COLUMNS, file)
+    print(f'[+] Exported {len(rows)} items to {output}')
+
+
+def add_catalog_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('-c', '--catalog', type=str, metavar='', default=CATALOG_PATH,
+                        help='Path to catalog database')
+    subparsers = parser.add_subparsers(dest='catalog_command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='Export items of the latest run in result csv format')
+    export_parser.add_argument('-o', '--output', type=str, metavar='', help='Output file. Prints to stdout if not specified')
+
+    history_parser = subparsers.add_parser('history', help='Show price and stock changes of the item')
+    history_parser.add_argument('product_code', type=str)
+
+    subparsers.add_parser('vanished', help='Show items missing in the latest run')
+
+
+def run_catalog_command(args) -> None:
+    with Catalog(args.catalog) as catalog:
+        if args.catalog_command == 'export':
+            export_items(catalog, args.output)
+        elif args.catalog_command == 'history':
+            write_rows_to_csv(catalog.get_price_history(args.product_code), HISTORY_COLUMNS, sys.stdout)
+        elif args.catalog_command == 'vanished':
+            write_rows_to_csv(catalog.get_vanished_items(catalog.get_latest_run()), VANISHED_COLUMNS, sys.stdout)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Query items catalog collected by parser')
+    add_catalog_arguments(parser)
+    run_catalog_command(parser.parse_args())
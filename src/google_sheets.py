@@ -6,6 +6,7 @@ import os
 import logging
 
 from src.settings import CATEGORIES_SHEET, STORAGE_DIR
+from src.utils import get_or_create_dir
 
 WORKSPACE_URL = os.environ.get('GOOGLE_SHEETS_URL', 'https://docs.google.com/spreadsheets/d/1ore1NTW2lnx8Jk8PpySAL673uWAbs2ljR56O_UQOTkI')
 CREDENTIALS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'steady-ether-286511-f1c23975d185.json')
@@ -29,7 +30,7 @@ def get_sheet_as_datafame(sheet: str, dropna: bool = True) -> pd.DataFrame:
     return records
 
 def get_sheet_as_dataframe_or_load_from_storage(sheet: str):
-    directory = STORAGE_DIR
+    directory = get_or_create_dir(STORAGE_DIR)
     stored_table_path = os.path.join(directory, f'{sheet}.csv')
     try:
         df = get_sheet_as_datafame(sheet)
@@ -0,0 +1,120 @@
+import os
+import requests
+
+from bs4 import BeautifulSoup, Tag
+from urllib.parse import urljoin
+
+
+SSO_URL = os.environ.get('SSO_URL', 'https://sso.intercars.eu/')
+FULL_OFFER_URL = os.environ.get('FULL_OFFER_URL', 'https://md.e-cat.intercars.eu/ru/vehicle/full-offer')
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/110.0'
+
+LOGIN_FORM_ID = 'loginForm'
+USERNAME_FIELD = 'loginForm:username'
+PASSWORD_FIELD = 'loginForm:password'
+SUBMIT_FIELD = 'loginForm:loginButton'
+# Captcha widgets are detected by their container classes and by scripts or frames loaded from captcha providers
+CAPTCHA_CLASSES = ('g-recaptcha', 'h-captcha', 'cf-turnstile')
+CAPTCHA_SOURCES = ('google.com/recaptcha', 'recaptcha.net', 'hcaptcha.com', 'challenges.cloudflare.com/turnstile')
+
+# SSO hands the session over to the catalog with forms submitted by javascript on load
+AUTO_SUBMIT_FORMS_LIMIT = 5
+
+
+class BrowserlessLoginError(Exception):
+    """Login flow can't be replayed without browser (captcha, unexpected page)."""
+
+
+class AuthorizationError(Exception):
+    """Credentials were rejected."""
+
+
+def get_form_data(form: Tag) -> dict:
+    data = {}
+    for element in form.find_all('input'):
+        name = element.get('name')
+        if not name or element.get('type') in ('submit', 'button', 'image', 'checkbox', 'radio'):
+            continue
+        data[name] = element.get('value', '')
+    return data
+
+
+def submit_form(session: requests.Session, page_url: str, form: Tag, data: dict) -> requests.Response:
+    action = urljoin(page_url, form.get('action') or page_url)
+    if form.get('method', 'get').lower() == 'post':
+        response = session.post(action, data=data, timeout=30)
+    else:
+        response = session.get(action, params=data, timeout=30)
+    response.raise_for_status()
+    return response
+
+
+def is_auto_submit_form(form: Tag) -> bool:
+    return all(element.get('type') in ('hidden', 'submit') for element in form.find_all('input')) and bool(form.find('input'))
+
+
+def has_captcha(soup: BeautifulSoup) -> bool:
+    if soup.find(class_=CAPTCHA_CLASSES):
+        return True
+    return any(source in element['src'] for element in soup.find_all(('script', 'iframe'), src=True) for source in CAPTCHA_SOURCES)
+
+
+def check_captcha(soup: BeautifulSoup) -> None:
+    if has_captcha(soup):
+        raise BrowserlessLoginError('Login page requires captcha')
+
+
+def follow_auto_submit_forms(session: requests.Session, response: requests.Response) -> requests.Response:
+    for _ in range(AUTO_SUBMIT_FORMS_LIMIT):
+        soup = BeautifulSoup(response.text, 'lxml')
+        form = soup.find('form')
+        if form is None or not is_auto_submit_form(form) or soup.find('input', attrs={'name': '_csrf'}):
+            return response
+        response = submit_form(session, response.url, form, get_form_data(form))
+    return response
+
+
+def log_in(session: requests.Session, username: str, password: str, sso_url: str | None = None) -> requests.Response:
+    response = session.get(sso_url or SSO_URL, timeout=30)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, 'lxml')
+    check_captcha(soup)
+
+    form = soup.find('form', id=LOGIN_FORM_ID)
+    if form is None:
+        raise BrowserlessLoginError(f'Login form not found on {response.url}')
+
+    data = get_form_data(form)
+    data.update({
+        USERNAME_FIELD: username,
+        PASSWORD_FIELD: password,
+        SUBMIT_FIELD: '',
+    })
+    response = submit_form(session, response.url, form, data)
+
+    soup = BeautifulSoup(response.text, 'lxml')
+    if soup.find(id='fail-message'):
+        raise AuthorizationError('Wrong username or password')
+    check_captcha(soup)
+    return follow_auto_submit_forms(session, response)
+
+
+def get_authorized_session(username: str, password: str, sso_url: str | None = None, full_offer_url: str | None = None) -> requests.Session:
+    """Replays SSO login form and redirect chain with plain HTTP.
+
+    Returns session with the same cookies and headers as the browser based login.
+    URLs default to `SSO_URL` and `FULL_OFFER_URL`, which can point to a local stand-in of the site (`src.sso_stand_in`).
+    """
+    session = requests.Session()
+    session.headers.update({'user-agent': USER_AGENT})
+    log_in(session, username, password, sso_url)
+
+    response = session.get(full_offer_url or FULL_OFFER_URL, timeout=30)
+    response.raise_for_status()
+    response = follow_auto_submit_forms(session, response)
+
+    csrf_input = BeautifulSoup(response.text, 'lxml').find('input', attrs={'name': '_csrf'})
+    if csrf_input is None:
+        raise BrowserlessLoginError(f'CSRF token not found on {response.url}')
+    session.headers.update({'X-CSRF-TOKEN': csrf_input.get('value')})
+    return session
@@ -1,17 +1,28 @@
 import asyncio
 import aiohttp
-import os
+import logging
+import math
 
 from bs4 import BeautifulSoup, Tag
-from src.settings import DEBUG
-from src.utils import prettify_description, drop_duplicates
-from src.models import BrandFilter
+from src.settings import DEBUG, RATE_LIMITS
+from src.utils import drop_duplicates
+from src.models import BrandFilter, FilterCrawl
 from src.urls import async_get_soup_from_url, add_query_params, join_search_query, get_query_params
 from src.progress import async_execute_tasks_with_progressbar
+from src.profiling import stage
+from src.rate_limit import RateLimiter, LISTING_ENDPOINT
 from src.brands import parse_brands_from_url, group_brands_into_filters_up_to_item_counter_limit
 from src.prices import get_item_prices_without_loss, append_prices_to_items
+from src.verification import get_crawls_to_refetch, should_split, split_crawl, build_coverage_report, write_coverage_report
 from itertools import chain
-from typing import Iterable, List
+from typing import Iterable, List, Tuple
+
+# Brand counters may be stale, so pages are parsed until the short one up to this times the counters
+MAX_PAGES_ESTIMATE_FACTOR = 2
+# Pages of a filter requested at once, so pages after the short one aren't requested in bulk
+PAGES_WAVE_SIZE = 5
+
+logger = logging.getLogger(__name__)
 
 
 def parse_item_number(item: BeautifulSoup | Tag) -> str:
@@ -63,10 +74,10 @@ def parse_item_product_code(item: BeautifulSoup | Tag) -> str:
     return item.get('data-product-code')
 
 
-def parse_item_description(item: BeautifulSoup | Tag) -> dict:
-    """Extracts the item description from a BeautifulSoup object representing an item."""
+def parse_item_description(item: BeautifulSoup | Tag) -> str:
+    """Extracts the item description text from a BeautifulSoup object representing an item."""
     try:
-        return prettify_description(item.find(class_='productfeaturesinline').text)
+        return item.find(class_='productfeaturesinline').text
     except AttributeError:
         return None
 
@@ -88,6 +99,7 @@ async def parse_items_from_soup(soup: BeautifulSoup) -> List[dict]:
             'product_code': parse_item_product_code(item_element),
             'delivery_time': parse_delivery_time(item_element),
             'stock_info': parse_stock_info(item_element),
+            # Raw text, attributes are split on postprocessing in chosen format
             'item_description': parse_item_description(item_element),
             'image_url': parse_image_url(item_element),
             'currency': 'MDL' # TODO: сделать нормально, но потом
@@ -95,10 +107,14 @@ async def parse_items_from_soup(soup: BeautifulSoup) -> List[dict]:
     return items_on_page
 
 
-async def get_items_from_page(session: aiohttp.ClientSession, url: str, sm: asyncio.Semaphore) -> List[dict]:
-    async with sm:
-        soup = await async_get_soup_from_url(session, url)
-        return await parse_items_from_soup(soup)
+async def get_page_soup(session: aiohttp.ClientSession, url: str, limiter: RateLimiter) -> BeautifulSoup:
+    async with limiter.limit(LISTING_ENDPOINT):
+        return await async_get_soup_from_url(session, url)
+
+
+async def get_items_from_page(session: aiohttp.ClientSession, url: str, limiter: RateLimiter) -> List[dict]:
+    soup = await get_page_soup(session, url, limiter)
+    return await parse_items_from_soup(soup)
 
 
 def get_url_for_page(subcategory_url: str, filter: BrandFilter, page: int) -> str:
@@ -111,34 +127,108 @@ def get_url_for_page(subcategory_url: str, filter: BrandFilter, page: int) -> st
     return url_with_params
 
 
-async def create_tasks_for_parsing_subcategory(session: aiohttp.ClientSession, url, sm: asyncio.Semaphore) -> List[asyncio.Task]:
-    async with sm:
-        brands_list = await parse_brands_from_url(session, url)
-        filters = group_brands_into_filters_up_to_item_counter_limit(
-            brands_list)
+async def crawl_filter(session: aiohttp.ClientSession, crawl: FilterCrawl, limiter: RateLimiter, start_page: int = 0) -> FilterCrawl:
+    """Parses pages of subcategory filtered by brands into `crawl`, starting from `start_page`.
+
+    Pages are requested `PAGES_WAVE_SIZE` at a time. Pagination stops on the first page
+    that isn't full or on `MAX_PAGES_ESTIMATE_FACTOR` times the brand counters, resumed
+    crawl parses at least one wave past `start_page`.
+    """
+    subcategory_url, brand_filter, page_size = crawl.subcategory_url, crawl.brand_filter, crawl.page_size
+    last_page_items = crawl.pages[start_page] = await get_items_from_page(
+        session, get_url_for_page(subcategory_url, brand_filter, start_page), limiter)
+
+    pages_limit = math.ceil(crawl.get_expected_count() * MAX_PAGES_ESTIMATE_FACTOR / page_size)
+    if start_page:
+        # Resumed crawl is already past the counters, so it gets at least one more wave
+        pages_limit = max(pages_limit, start_page + 1 + PAGES_WAVE_SIZE)
+    page = start_page + 1
+    while page < pages_limit and len(last_page_items) == page_size:
+        tasks = [asyncio.create_task(get_items_from_page(session, get_url_for_page(subcategory_url, brand_filter, wave_page), limiter))
+                 for wave_page in range(page, min(page + PAGES_WAVE_SIZE, pages_limit))]
+        try:
+            for task in tasks:
+                last_page_items = crawl.pages[page] = await task
+                page += 1
+                if len(last_page_items) < page_size:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+    if len(last_page_items) == page_size:
+        logger.warning(f'Filter {brand_filter.get_filter_query()} of {subcategory_url}: stopped on {page} pages limit, '
+                       f'estimated {crawl.get_expected_count()} items')
+
+    message = f'Filter {brand_filter.get_filter_query()} of {subcategory_url}: estimated {crawl.get_expected_count()}, ' \
+              f'parsed {crawl.get_parsed_count()} items'
+    if crawl.get_parsed_count() != crawl.get_expected_count():
+        logger.warning(message)
+    else:
+        logger.info(message)
+    return crawl
+
+
+async def create_tasks_for_parsing_subcategory(session: aiohttp.ClientSession, url, limiter: RateLimiter) -> List[Tuple[FilterCrawl, asyncio.Task]]:
+    brands_list = await parse_brands_from_url(session, url, limiter)
+    filters = group_brands_into_filters_up_to_item_counter_limit(
+        brands_list)
+    tasks = []
+    for brand_filter in filters:
+        crawl = FilterCrawl(url, brand_filter)
+        tasks.append((crawl, asyncio.create_task(
+            crawl_filter(session, crawl, limiter))))
+    return tasks
+
+
+async def refetch_incomplete_crawls(session: aiohttp.ClientSession, crawls: List[FilterCrawl], limiter: RateLimiter, attempts: int = 3) -> List[FilterCrawl]:
+    """Re-queues only filters that came up short, splitting the ones capped by the site.
+
+    Capped single brand filters can't be split, so they aren't re-fetched and are listed in coverage report.
+    """
+    crawls = list(crawls)
+    for _ in range(attempts):
+        incomplete_crawls = get_crawls_to_refetch(crawls)
+        if not incomplete_crawls:
+            break
+        print(f'- {len(incomplete_crawls)} brand filters are incomplete. Re-fetching...')
+
         tasks = []
-        for brand_filter in filters:
-            for page in range(brand_filter.get_total_items_count() // 25 + 1):
-                page_url = get_url_for_page(url, brand_filter, page)
-                tasks.append(asyncio.create_task(
-                    get_items_from_page(session, page_url, sm)))
-        return tasks
+        for crawl in incomplete_crawls:
+            if should_split(crawl):
+                for child in split_crawl(crawl):
+                    crawls.append(child)
+                    tasks.append(asyncio.create_task(crawl_filter(session, child, limiter)))
+            else:
+                crawl.attempts += 1
+                tasks.append(asyncio.create_task(crawl_filter(session, crawl, limiter, crawl.get_resume_page())))
+        await async_execute_tasks_with_progressbar(tasks, True, desc='[+] Re-fetching incomplete filters')
+
+    report_path = write_coverage_report(build_coverage_report(crawls))
+    print(f'[+] Coverage report: {report_path}')
+    return crawls
 
 
 async def gather_data(page_URLs: Iterable[str], session: aiohttp.ClientSession) -> None:
-    sm = asyncio.Semaphore((2 * os.cpu_count()) + 1)
+    limiter = RateLimiter(RATE_LIMITS)
     tasks = []
     subtasks = []
 
-    for url in page_URLs:
-        subtasks.append(asyncio.create_task(create_tasks_for_parsing_subcategory(session, url, sm)))
+    with stage('tasks'):
+        for url in page_URLs:
+            subtasks.append(asyncio.create_task(create_tasks_for_parsing_subcategory(session, url, limiter)))
+
+        subtasks_results = await async_execute_tasks_with_progressbar(subtasks, not DEBUG, desc='[+] Preparing tasks')
+        for result in subtasks_results:
+            tasks += result
 
-    subtasks_results = await async_execute_tasks_with_progressbar(subtasks, not DEBUG, desc='[+] Preparing tasks')
-    for result in subtasks_results:
-        tasks += result
+    with stage('pages'):
+        # Failed filters keep parsed pages in their crawls and are re-fetched on verification
+        await async_execute_tasks_with_progressbar([task for _, task in tasks], True, desc='[+] Parsing brand filters')
+        crawls = await refetch_incomplete_crawls(session, [crawl for crawl, _ in tasks], limiter)
 
-    product_items = list(chain(*await async_execute_tasks_with_progressbar(tasks, desc='[+] Parsing pages')))
+    product_items = list(chain(*(crawl.get_items() for crawl in crawls)))
     product_items = drop_duplicates(product_items, 'product_code')
-    prices = await get_item_prices_without_loss(session, [item['product_code'] for item in product_items], sm)
+    with stage('prices'):
+        prices = await get_item_prices_without_loss(session, [item['product_code'] for item in product_items], limiter)
 
     return append_prices_to_items(product_items, prices)
@@ -1,4 +1,6 @@
-from typing import Iterable
+from itertools import chain
+from typing import Dict, Iterable, List
+from src.settings import LISTING_PAGE_SIZE
 
 
 class Brand:
@@ -21,6 +23,42 @@ class BrandFilter:
         return sum(brand.items_count for brand in self.brands_list)
 
 
+class FilterCrawl:
+    """Parsing state of a subcategory filtered by brands."""
+
+    def __init__(self, subcategory_url: str, brand_filter: BrandFilter, parent: 'FilterCrawl | None' = None) -> None:
+        self.subcategory_url = subcategory_url
+        self.brand_filter = brand_filter
+        self.parent = parent
+        self.children: List['FilterCrawl'] = []
+        self.pages: Dict[int, List[dict]] = {}
+        self.page_size = LISTING_PAGE_SIZE
+        self.attempts = 0
+
+    def get_items(self) -> List[dict]:
+        return list(chain(*(self.pages[page] for page in sorted(self.pages))))
+
+    def get_parsed_count(self) -> int:
+        return len({item['product_code'] for item in self.get_items()})
+
+    def get_expected_count(self) -> int:
+        return self.brand_filter.get_total_items_count()
+
+    def is_complete(self) -> bool:
+        """Whether full pages were parsed without gaps up to the one that isn't full.
+
+        Brand counters may be stale, so only the short page marks the end of results.
+        """
+        return self.get_resume_page() in self.pages
+
+    def get_resume_page(self) -> int:
+        """Returns the first page that wasn't parsed as a full one."""
+        page = 0
+        while len(self.pages.get(page, [])) == self.page_size:
+            page += 1
+        return page
+
+
 class ItemPrice:
     def __init__(self, product_code: str, price: float | None) -> None:
         self.product_code = product_code
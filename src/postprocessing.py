@@ -0,0 +1,71 @@
+import os
+import pandas as pd
+
+from datetime import datetime
+from src.attributes import DescriptionTable
+from src.google_sheets import get_sheet_as_dataframe_or_load_from_storage
+from src.settings import RESULTS_DIR, PREFIXES_SHEET, DELIVERY_SHEET
+from src.utils import get_or_create_dir
+
+
+# Attribute columns of `wide` format are prefixed, so they don't collide with columns of result
+ATTRIBUTE_COLUMN_PREFIX = 'attr:'
+
+
+def get_mapping(sheetname: str):
+    df = get_sheet_as_dataframe_or_load_from_storage(sheetname)
+    return dict(zip(df[df.columns[0]].astype(str), df[df.columns[1]].astype(str)))
+
+
+def remove_prefix(row, prefixes: dict):
+    if row['item_brand'] in prefixes:
+        prefix = prefixes[row['item_brand']]
+        return row['item_number'].replace(prefix, '')
+    else:
+        return row['item_number']
+
+
+def remove_prefixes_from_dataframe(df: pd.DataFrame):
+    prefixes = get_mapping(PREFIXES_SHEET)
+    df['item_number'] = df.apply(lambda x: remove_prefix(x, prefixes), axis=1)
+    return df
+
+
+def adjust_delivery_time(date: str, dates_mapping: dict):
+    if date in dates_mapping:
+        return dates_mapping[date]
+    return date
+
+
+def adjust_delivery_time_in_dataframe(df: pd.DataFrame):
+    dates_mapping = get_mapping(DELIVERY_SHEET)
+    df['delivery_time'] = df['delivery_time'].apply(lambda x: adjust_delivery_time(x, dates_mapping))
+    return df
+
+
+def get_descriptions_table(df: pd.DataFrame) -> DescriptionTable:
+    descriptions = DescriptionTable()
+    for product_code, description in zip(df['product_code'], df['item_description']):
+        if isinstance(description, str):
+            descriptions.add(product_code, description)
+    return descriptions
+
+
+def add_descriptions_to_dataframe(df: pd.DataFrame, descriptions: DescriptionTable, description_format: str):
+    """Returns copy of `df` with raw `item_description` replaced by attributes in `description_format`."""
+    product_codes = df['product_code'].to_list()
+    if description_format == 'wide':
+        attributes = pd.DataFrame(descriptions.to_columns(product_codes), index=df.index)
+        attributes.columns = [ATTRIBUTE_COLUMN_PREFIX + name for name in attributes.columns]
+        position = df.columns.get_loc('item_description')
+        return pd.concat([df.iloc[:, :position], attributes, df.iloc[:, position + 1:]], axis=1)
+    return df.assign(item_description=descriptions.serialize(product_codes, description_format))
+
+
+def write_result_to_file(df: pd.DataFrame):
+    directory = get_or_create_dir(RESULTS_DIR)
+    filename = f'{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.csv'
+    filepath = os.path.join(directory, filename)
+    pd.DataFrame(df).to_csv(filepath, index=False)
+
+    return filepath
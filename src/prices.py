@@ -1,5 +1,4 @@
 import aiohttp
-import asyncio
 import json
 import time
 
@@ -9,10 +8,11 @@ from itertools import chain
 from src.utils import divide_chunks, split_array_by_condition, fix_encoding
 from src.progress import async_execute_tasks_with_progressbar
 from src.models import ItemPrice
+from src.rate_limit import RateLimiter, PRICES_ENDPOINT
 from src.settings import DEBUG
 
 
-async def fetch_missing_prices_from_API(session: aiohttp.ClientSession, product_codes: Iterable[str], semaphore: asyncio.Semaphore) -> str:
+async def fetch_missing_prices_from_API(session: aiohttp.ClientSession, product_codes: Iterable[str], limiter: RateLimiter) -> str:
     url = 'https://md.e-cat.intercars.eu/ru/api/product/price/missing?isError=false'
     payload = [{"productCode": code,
                 "quantity": 1,
@@ -22,7 +22,7 @@ async def fetch_missing_prices_from_API(session: aiohttp.ClientSession, product_
                 "coreType": None,
                 "omnibusPriceTimestamp": None,
                 } for code in product_codes]
-    async with semaphore:
+    async with limiter.limit(PRICES_ENDPOINT):
         async with session.post(url, json=payload, timeout=20) as response:
             return await response.text()
 
@@ -45,25 +45,25 @@ def parse_prices_from_response(response: str) -> str:
     return data
 
 
-async def get_prices(session: aiohttp.ClientSession, product_codes: Iterable[str], semaphore):
-    response = await fetch_missing_prices_from_API(session, product_codes, semaphore)
+async def get_prices(session: aiohttp.ClientSession, product_codes: Iterable[str], limiter: RateLimiter):
+    response = await fetch_missing_prices_from_API(session, product_codes, limiter)
     return parse_prices_from_response(response)
 
 
-async def get_item_prices(session: aiohttp.ClientSession, product_codes: Iterable[str], semaphore) -> List[ItemPrice]:
+async def get_item_prices(session: aiohttp.ClientSession, product_codes: Iterable[str], limiter: RateLimiter) -> List[ItemPrice]:
     tasks = []
     for chunk in divide_chunks(product_codes, 200):
-        tasks.append(get_prices(session, chunk, semaphore))
+        tasks.append(get_prices(session, chunk, limiter))
     results = await async_execute_tasks_with_progressbar(tasks, not DEBUG, desc='[+] Parsing item prices')
 
     return list(chain(*results))
 
-async def get_item_prices_without_loss(session: aiohttp.ClientSession, product_codes: Iterable[str], semaphore: asyncio.Semaphore, retries: int = 3, timeout: int = 5):
+async def get_item_prices_without_loss(session: aiohttp.ClientSession, product_codes: Iterable[str], limiter: RateLimiter, retries: int = 3, timeout: int = 5):
     """Parse prices from api with minimum losses"""
     i = 0
     retry_timeout = timeout
 
-    prices = await get_item_prices(session, product_codes, semaphore)
+    prices = await get_item_prices(session, product_codes, limiter)
     print('- Searching for losses...')
     ok, losses = split_array_by_condition(lambda x: x.price == None, prices)
     while i < retries:
@@ -71,7 +71,7 @@ async def get_item_prices_without_loss(session: aiohttp.ClientSession, product_c
         if losses:
             print(f'- {len(losses)} losses found. Retrying...')
             # Retry get query and define missing prices if they are
-            retry_prices = await get_item_prices(session, [i.product_code for i in losses], semaphore)
+            retry_prices = await get_item_prices(session, [i.product_code for i in losses], limiter)
             print('- Searching for losses...')
             retry_ok, retry_losses = split_array_by_condition(lambda x: x.price == None, retry_prices)
 
@@ -0,0 +1,144 @@
+import asyncio
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable
+from src.settings import LOGS_DIR
+from src.utils import get_or_create_dir
+
+
+RUN_STAGE = 'run'
+STAGES = ('subcategories', 'tasks', 'pages', 'prices', 'postprocessing')
+PROFILERS = ('cprofile', 'sampling')
+
+
+class SamplingProfiler:
+    """Samples call stack of a thread and saves it in folded format (speedscope, flamegraph.pl, inferno)."""
+
+    def __init__(self, interval: float = 0.005, thread_id: int | None = None) -> None:
+        self.interval = interval
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def enable(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def disable(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def dump_stats(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f'{stack} {count}\n')
+
+
+class RunProfiler:
+    """Profiles the whole run or selected stages of it.
+
+    Stages are marked with `stage(name)` context manager. Every profiled stage is saved to
+    `output_dir` as `.prof` (cProfile, for pstats/snakeviz) or `.folded` (sampling) file.
+    Tracemalloc snapshots are saved at the end of every stage.
+    """
+
+    def __init__(self, profiler: str | None = None, stages: Iterable[str] = (), trace_memory: bool = False,
+                 slow_callback_ms: int | None = None, sampling_interval_ms: int = 5, output_dir: str = LOGS_DIR) -> None:
+        self.profiler = profiler
+        self.stages = set(stages) or {RUN_STAGE}
+        self.trace_memory = trace_memory
+        self.slow_callback_ms = slow_callback_ms
+        self.sampling_interval_ms = sampling_interval_ms
+        self.output_dir = output_dir
+        self.prefix = f'profile_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}'
+        self._last_snapshot = None
+
+    def get_output_path(self, suffix: str) -> str:
+        return os.path.join(get_or_create_dir(self.output_dir), f'{self.prefix}_{suffix}')
+
+    def create_profiler(self):
+        if self.profiler == 'cprofile':
+            return cProfile.Profile(), 'prof'
+        return SamplingProfiler(self.sampling_interval_ms / 1000), 'folded'
+
+    def watch_slow_callbacks(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Makes asyncio log callbacks that block the loop longer than threshold."""
+        if not self.slow_callback_ms:
+            return
+        loop.set_debug(True)
+        loop.slow_callback_duration = self.slow_callback_ms / 1000
+        handler = logging.FileHandler(self.get_output_path('slow_callbacks.log'))
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+        asyncio_logger = logging.getLogger('asyncio')
+        asyncio_logger.addHandler(handler)
+        asyncio_logger.setLevel(logging.WARNING)
+
+    def take_memory_snapshot(self, name: str) -> None:
+        snapshot = tracemalloc.take_snapshot()
+        snapshot.dump(self.get_output_path(f'{name}.tracemalloc'))
+        current, peak = tracemalloc.get_traced_memory()
+        with open(self.get_output_path('tracemalloc.txt'), 'a', encoding='utf-8') as file:
+            file.write(f'=== {name}: current {current / 2 ** 20:.1f} MiB, peak {peak / 2 ** 20:.1f} MiB\n')
+            if self._last_snapshot is not None:
+                for stat in snapshot.compare_to(self._last_snapshot, 'lineno')[:20]:
+                    file.write(f'{stat}\n')
+        self._last_snapshot = snapshot
+
+    @contextmanager
+    def stage(self, name: str):
+        if name == RUN_STAGE and self.trace_memory:
+            tracemalloc.start()
+
+        profiler = None
+        if self.profiler and name in self.stages:
+            profiler, extension = self.create_profiler()
+            profiler.enable()
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(self.get_output_path(f'{name}.{extension}'))
+            if self.profiler or self.trace_memory:
+                print(f'- Stage `{name}` took {time.perf_counter() - started_at:.1f}s')
+            if self.trace_memory and tracemalloc.is_tracing():
+                self.take_memory_snapshot(name)
+                if name == RUN_STAGE:
+                    tracemalloc.stop()
+
+
+profiler = RunProfiler()
+
+
+def configure_profiler(**kwargs) -> RunProfiler:
+    global profiler
+    profiler = RunProfiler(**kwargs)
+    return profiler
+
+
+def stage(name: str):
+    """Marks a stage of the run for the configured profiler."""
+    return profiler.stage(name)
@@ -0,0 +1,108 @@
+import aiohttp
+import asyncio
+import time
+
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict
+
+
+FACETS_ENDPOINT = 'facets'
+LISTING_ENDPOINT = 'listing'
+PRICES_ENDPOINT = 'prices'
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average with bursts up to `burst`."""
+
+    def __init__(self, rate: float | None, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        if not self.rate:
+            return
+        # Waiters are served one by one, so tokens are handed out in FIFO order
+        async with self.lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class _LimitedBlock:
+    """Requests sent inside one `limit()` block."""
+
+    def __init__(self, bucket: TokenBucket) -> None:
+        self.bucket = bucket
+        self.requests_count = 0
+
+
+_current_block: ContextVar[_LimitedBlock | None] = ContextVar('current_block', default=None)
+
+
+class EndpointLimiter:
+    def __init__(self, rate: float | None, burst: int = 1, concurrency: int | None = None) -> None:
+        self.bucket = TokenBucket(rate, burst)
+        self.semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+    @asynccontextmanager
+    async def _limited_block(self):
+        await self.bucket.acquire()
+        token = _current_block.set(_LimitedBlock(self.bucket))
+        try:
+            yield
+        finally:
+            _current_block.reset(token)
+
+    @asynccontextmanager
+    async def limit(self):
+        if self.semaphore is None:
+            async with self._limited_block():
+                yield
+            return
+        async with self.semaphore:
+            async with self._limited_block():
+                yield
+
+
+class RateLimiter:
+    """Keeps separate request budget for every endpoint class.
+
+    Usage:
+        async with limiter.limit(PRICES_ENDPOINT):
+            ...
+    """
+
+    def __init__(self, limits: Dict[str, dict]) -> None:
+        self.limiters = {endpoint: EndpointLimiter(**options) for endpoint, options in limits.items()}
+
+    def limit(self, endpoint: str):
+        return self.limiters[endpoint].limit()
+
+
+async def on_request_start(session: aiohttp.ClientSession, trace_config_ctx, params: aiohttp.TraceRequestStartParams) -> None:
+    # The first request of a block is paid by `limit()`. Retries sent by `RetryClient` or by
+    # session pool on another identity are made inside the same block and take own tokens
+    block = _current_block.get()
+    if block is None:
+        return
+    if block.requests_count:
+        await block.bucket.acquire()
+    block.requests_count += 1
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """Returns trace config that charges every request attempt to the endpoint budget it's sent under."""
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    return trace_config
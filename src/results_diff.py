@@ -0,0 +1,33 @@
+import csv
+
+from typing import Dict, List
+
+
+DIFF_FIELDS = ['product_code', 'change', 'field', 'old_value', 'new_value']
+COMPARED_FIELDS = ['price', 'stock_info', 'delivery_time', 'item_number', 'item_name']
+
+
+def read_result(path: str) -> Dict[str, dict]:
+    with open(path, 'r', newline='', encoding='utf-8') as file:
+        return {row['product_code']: row for row in csv.DictReader(file)}
+
+
+def diff_results(old: Dict[str, dict], new: Dict[str, dict]) -> List[dict]:
+    changes = []
+    for product_code in old.keys() - new.keys():
+        changes.append({'product_code': product_code, 'change': 'removed'})
+    for product_code in new.keys() - old.keys():
+        changes.append({'product_code': product_code, 'change': 'added'})
+    for product_code in old.keys() & new.keys():
+        for field in COMPARED_FIELDS:
+            old_value, new_value = old[product_code].get(field), new[product_code].get(field)
+            if old_value != new_value:
+                changes.append({'product_code': product_code, 'change': 'changed', 'field': field,
+                                'old_value': old_value, 'new_value': new_value})
+    return sorted(changes, key=lambda change: (change['change'], change['product_code']))
+
+
+def write_diff(changes: List[dict], file) -> None:
+    writer = csv.DictWriter(file, fieldnames=DIFF_FIELDS)
+    writer.writeheader()
+    writer.writerows(changes)
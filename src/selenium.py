@@ -1,5 +1,4 @@
 import requests
-import sys
 import os
 import platform
 import zipfile
@@ -14,6 +13,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By as by
 from src.settings import BASE_DIR
+from src.http_login import AuthorizationError
 
 
 GECKODRIVER_VERISON = 'v0.32.2'
@@ -90,7 +90,7 @@ def log_in(driver, username: str, password: str) -> None:
             driver.implicitly_wait(10)
             if driver.find_elements(by.ID, 'fail-message'):
                 print('[!] Authorization Error: Wrong username or password')
-                sys.exit('Authorization Error')
+                raise AuthorizationError('Wrong username or password')
             return
         except StaleElementReferenceException:
             print('waiting')
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+
+from aiohttp import ClientResponse
+from aiohttp_retry import RetryClient, RetryOptionsBase
+from typing import Iterable, List, Tuple
+from src.authorization import get_authorized_session
+from src import http_login
+from src.http_login import AuthorizationError
+from src.urls import create_aiohttp_session
+
+
+THROTTLED_STATUSES = (429,)
+EXPIRED_STATUSES = (401, 403)
+REAUTH_ATTEMPTS = 3
+REAUTH_TIMEOUT = 30
+
+logger = logging.getLogger(__name__)
+
+
+class NoSessionsAvailable(Exception):
+    pass
+
+
+class PooledSession:
+    """One authorized identity of the pool: credentials plus the client built from its cookies."""
+
+    def __init__(self, username: str | None, password: str | None) -> None:
+        self.username = username
+        self.password = password
+        self.client: RetryClient | None = None
+        self.healthy = False
+        self.dead = False
+        self.in_flight = 0
+        self.requests_count = 0
+
+    def __repr__(self) -> str:
+        return f'<PooledSession {self.username or "manual"}>'
+
+
+class _PooledRequestContext:
+    def __init__(self, pool: 'SessionPool', method: str, url: str, kwargs: dict) -> None:
+        self._pool = pool
+        self._method = method
+        self._url = url
+        self._kwargs = kwargs
+        self._identity = None
+        self._context = None
+
+    async def __aenter__(self) -> ClientResponse:
+        # Every identity gets a chance before the request is given up
+        for _ in range(len(self._pool.identities) + 1):
+            identity = await self._pool.acquire()
+            context = identity.client.request(self._method, self._url, **self._kwargs)
+            try:
+                response = await context.__aenter__()
+            except BaseException:
+                self._pool.release(identity)
+                raise
+
+            reason = get_unhealthy_reason(response)
+            if reason is None:
+                self._identity = identity
+                self._context = context
+                return response
+
+            await context.__aexit__(None, None, None)
+            self._pool.release(identity)
+            self._pool.retire(identity, reason)
+
+        raise NoSessionsAvailable(f'Every session in pool was rejected on {self._url}')
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            await self._context.__aexit__(exc_type, exc, tb)
+        finally:
+            self._pool.release(self._identity)
+
+
+def get_unhealthy_reason(response: ClientResponse) -> str | None:
+    if response.status in THROTTLED_STATUSES:
+        return 'throttled'
+    # Expired session is redirected to login pages, `SSO_URL` is read here as it may point to a stand-in
+    if response.status in EXPIRED_STATUSES or str(response.url).startswith(http_login.SSO_URL):
+        return 'expired'
+    return None
+
+
+class SessionPool:
+    """Routes requests across several authorized sessions.
+
+    Exposes the same `get`/`post` interface as `RetryClient`, so it can be passed
+    wherever a client is expected. Throttled or expired sessions are taken out of
+    rotation and re-authorized in background.
+    """
+
+    def __init__(self, credentials: Iterable[Tuple[str | None, str | None]], retry_options: RetryOptionsBase, login_backend: str = 'auto') -> None:
+        self.identities = [PooledSession(username, password) for username, password in credentials]
+        self.retry_options = retry_options
+        self.login_backend = login_backend
+        self._available = asyncio.Condition()
+        self._reauth_tasks = set()
+        self._stale_clients = []
+
+        if not self.identities:
+            raise ValueError('At least one set of credentials is required')
+
+    async def __aenter__(self) -> 'SessionPool':
+        try:
+            await self.open()
+        except BaseException:
+            # Clients of identities authorized before the failure are closed as well
+            await self.close()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def _authorize(self, identity: PooledSession) -> None:
+        sync_session = await asyncio.to_thread(get_authorized_session, identity.username, identity.password, self.login_backend)
+        if identity.client is not None:
+            # Requests started before expiration may still use the old client, so it's closed with the pool
+            self._stale_clients.append(identity.client)
+        identity.client = RetryClient(create_aiohttp_session(sync_session), retry_options=self.retry_options)
+
+        async with self._available:
+            identity.healthy = True
+            self._available.notify_all()
+
+    async def open(self) -> None:
+        results = await asyncio.gather(*(self._authorize(identity) for identity in self.identities), return_exceptions=True)
+        for identity, result in zip(self.identities, results):
+            if isinstance(result, BaseException):
+                identity.dead = True
+                logger.error(f'Unable to authorize {identity}', exc_info=result)
+
+        if not self.get_alive():
+            raise NoSessionsAvailable('Unable to authorize any session')
+        print(f'[+] {len(self.get_healthy())} of {len(self.identities)} sessions authorized')
+
+    async def close(self) -> None:
+        for task in self._reauth_tasks:
+            task.cancel()
+        await asyncio.gather(*self._reauth_tasks, return_exceptions=True)
+        for client in self._stale_clients:
+            await client.close()
+        for identity in self.identities:
+            if identity.client is not None:
+                await identity.client.close()
+
+    def get_alive(self) -> List[PooledSession]:
+        return [identity for identity in self.identities if not identity.dead]
+
+    def get_healthy(self) -> List[PooledSession]:
+        return [identity for identity in self.identities if identity.healthy and not identity.dead]
+
+    async def acquire(self) -> PooledSession:
+        async with self._available:
+            while not self.get_healthy():
+                if not self.get_alive():
+                    raise NoSessionsAvailable('All sessions in pool failed to re-authorize')
+                await self._available.wait()
+
+            # Ties go to the least used identity, so requests are spread even when sent one by one
+            identity = min(self.get_healthy(), key=lambda identity: (identity.in_flight, identity.requests_count))
+            identity.in_flight += 1
+            identity.requests_count += 1
+            return identity
+
+    def release(self, identity: PooledSession) -> None:
+        identity.in_flight -= 1
+
+    def retire(self, identity: PooledSession, reason: str) -> None:
+        if not identity.healthy:
+            return
+        identity.healthy = False
+        logger.warning(f'{identity} is {reason} after {identity.requests_count} requests. Re-authorizing')
+        task = asyncio.create_task(self._reauthorize(identity))
+        self._reauth_tasks.add(task)
+        task.add_done_callback(self._reauth_tasks.discard)
+
+    async def _reauthorize(self, identity: PooledSession) -> None:
+        for attempt in range(REAUTH_ATTEMPTS):
+            try:
+                await self._authorize(identity)
+                identity.requests_count = 0
+                return
+            except AuthorizationError:
+                # Rejected credentials won't be accepted on the next attempt either
+                logger.exception(f'Credentials of {identity} were rejected')
+                break
+            except Exception:
+                logger.exception(f'Re-authorization of {identity} failed (attempt {attempt + 1}/{REAUTH_ATTEMPTS})')
+                await asyncio.sleep(REAUTH_TIMEOUT)
+
+        async with self._available:
+            identity.dead = True
+            self._available.notify_all()
+
+    def request(self, method: str, url: str, **kwargs) -> _PooledRequestContext:
+        return _PooledRequestContext(self, method, url, kwargs)
+
+    def get(self, url: str, **kwargs) -> _PooledRequestContext:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> _PooledRequestContext:
+        return self.request('POST', url, **kwargs)
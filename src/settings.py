@@ -1,17 +1,27 @@
 import os
 
-from src.utils import get_or_create_dir
-
 DEBUG = False
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-LOGS_DIR = get_or_create_dir(os.path.join(BASE_DIR, 'logs'))
-STORAGE_DIR = get_or_create_dir(os.path.join(BASE_DIR, 'storage'))
-RESULTS_DIR = get_or_create_dir(os.path.join(BASE_DIR, 'results'))
+# Directories are created on first write with `get_or_create_dir`
+LOGS_DIR = os.path.join(BASE_DIR, 'logs')
+STORAGE_DIR = os.path.join(BASE_DIR, 'storage')
+RESULTS_DIR = os.path.join(BASE_DIR, 'results')
 
 PREFIXES_SHEET = 'Prefixes'
 DELIVERY_SHEET = 'Delivery'
 CATEGORIES_SHEET = 'Categories'
 
+# Items per listing page as the site serves them, page that isn't full is the last one
+LISTING_PAGE_SIZE = 25
+
+LOGIN_BACKENDS = ('auto', 'http', 'browser')
+DESCRIPTION_FORMATS = ('dict', 'json', 'wide')
 
-print(BASE_DIR)
\ No newline at end of file
+# Request budgets per endpoint class: `rate` - steady requests per second (None for unlimited),
+# `burst` - requests allowed at once above steady rate, `concurrency` - requests in flight
+RATE_LIMITS = {
+    'facets': {'rate': 5, 'burst': 10, 'concurrency': os.cpu_count() + 1},
+    'listing': {'rate': 10, 'burst': 20, 'concurrency': (2 * os.cpu_count()) + 1},
+    'prices': {'rate': 4, 'burst': 8, 'concurrency': os.cpu_count() + 1},
+}
@@ -0,0 +1,193 @@
+"""Local stand-in of the SSO login pages for checking the browserless login flow.
+
+Serves the JSF login form, the form the SSO submits on load to hand the session over
+to the catalog and the full offer page with `_csrf` token:
+
+    python -m src.sso_stand_in                  # serve, then run the parser with printed env variables
+    python -m src.sso_stand_in --check          # replay login against it and exit
+    python -m src.sso_stand_in --check --captcha
+"""
+import argparse
+import sys
+import threading
+
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+LOGIN_PAGE = '''<!DOCTYPE html>
+<html><body>
+{fail_message}
+<form id="loginForm" name="loginForm" method="post" action="/sso/login?execution=e1s1">
+<input type="hidden" name="loginForm" value="loginForm"/>
+<input type="text" id="loginForm:username" name="loginForm:username"/>
+<input type="password" id="loginForm:password" name="loginForm:password"/>
+<input type="hidden" name="javax.faces.ViewState" value="{view_state}"/>
+{captcha}
+<button type="submit" id="loginForm:loginButton" name="loginForm:loginButton">Войти</button>
+</form>
+<script src="/resources/js/captcha-free-login.js"></script>
+</body></html>'''
+
+HANDOVER_PAGE = '''<!DOCTYPE html>
+<html><body onload="document.forms[0].submit()">
+<form method="post" action="/acs">
+<input type="hidden" name="SAMLResponse" value="{saml_response}"/>
+<noscript><input type="submit" value="Continue"/></noscript>
+</form>
+</body></html>'''
+
+FULL_OFFER_PAGE = '''<!DOCTYPE html>
+<html><body>
+<form id="leftMenuForm"><input type="hidden" name="_csrf" value="{csrf_token}"/><input type="text" name="q"/></form>
+<div class="categoriestree__category"></div>
+</body></html>'''
+
+CAPTCHA_WIDGET = '<div class="g-recaptcha" data-sitekey="stand-in"></div>'
+FAIL_MESSAGE = '<div id="fail-message">Неверное имя пользователя или пароль</div>'
+
+VIEW_STATE = 'stand-in-view-state'
+SAML_RESPONSE = 'stand-in-saml-response'
+SSO_COOKIE = 'SSOSESSION'
+CATALOG_COOKIE = 'JSESSIONID'
+CSRF_TOKEN = 'stand-in-csrf-token'
+
+
+class SSORequestHandler(BaseHTTPRequestHandler):
+    # Set on server class by `create_server`
+    username: str
+    password: str
+    captcha: bool
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def get_cookies(self) -> dict:
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        return {name: morsel.value for name, morsel in cookie.items()}
+
+    def read_form(self) -> dict:
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+        return {name: values[-1] for name, values in parse_qs(body, keep_blank_values=True).items()}
+
+    def send_page(self, html: str, status: int = 200) -> None:
+        body = html.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def redirect(self, location: str, cookie: str | None = None) -> None:
+        self.send_response(302)
+        self.send_header('Location', location)
+        if cookie:
+            self.send_header('Set-Cookie', f'{cookie}; Path=/')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def send_login_page(self, fail_message: str = '') -> None:
+        captcha = CAPTCHA_WIDGET if self.server.captcha else ''
+        self.send_page(LOGIN_PAGE.format(fail_message=fail_message, view_state=VIEW_STATE, captcha=captcha))
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        cookies = self.get_cookies()
+        if path == '/sso/':
+            self.send_login_page()
+        elif path == '/sso/saml':
+            if cookies.get(SSO_COOKIE) != 'authorized':
+                self.redirect('/sso/')
+                return
+            self.send_page(HANDOVER_PAGE.format(saml_response=SAML_RESPONSE))
+        elif path == '/full-offer':
+            if cookies.get(CATALOG_COOKIE) != 'authorized':
+                self.redirect('/sso/saml')
+                return
+            self.send_page(FULL_OFFER_PAGE.format(csrf_token=CSRF_TOKEN))
+        else:
+            self.send_page('Not found', 404)
+
+    def do_POST(self) -> None:
+        path = urlparse(self.path).path
+        form = self.read_form()
+        if path == '/sso/login':
+            if form.get('javax.faces.ViewState') != VIEW_STATE or 'loginForm:loginButton' not in form:
+                self.send_page('Form fields are missing', 400)
+            elif (form.get('loginForm:username'), form.get('loginForm:password')) != (self.server.username, self.server.password):
+                self.send_login_page(FAIL_MESSAGE)
+            else:
+                self.redirect('/sso/saml', f'{SSO_COOKIE}=authorized')
+        elif path == '/acs':
+            if form.get('SAMLResponse') != SAML_RESPONSE:
+                self.send_page('Invalid SAML response', 400)
+                return
+            self.redirect('/full-offer', f'{CATALOG_COOKIE}=authorized')
+        else:
+            self.send_page('Not found', 404)
+
+
+def create_server(host: str = '127.0.0.1', port: int = 0, username: str = 'user', password: str = 'password',
+                  captcha: bool = False) -> ThreadingHTTPServer:
+    """Returns stand-in server, port 0 picks a free one."""
+    server = ThreadingHTTPServer((host, port), SSORequestHandler)
+    server.username = username
+    server.password = password
+    server.captcha = captcha
+    return server
+
+
+def get_urls(server: ThreadingHTTPServer) -> tuple:
+    """Returns `SSO_URL` and `FULL_OFFER_URL` of the stand-in."""
+    host, port = server.server_address[:2]
+    # Login pages live under `/sso/`, so expired catalog requests are told apart by URL as on the real site
+    return f'http://{host}:{port}/sso/', f'http://{host}:{port}/full-offer'
+
+
+def check_login(server: ThreadingHTTPServer) -> bool:
+    from src import http_login
+
+    sso_url, full_offer_url = get_urls(server)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        session = http_login.get_authorized_session(server.username, server.password, sso_url, full_offer_url)
+    except (http_login.BrowserlessLoginError, http_login.AuthorizationError) as e:
+        print(f'[!] Browserless login failed: {e}')
+        return False
+    finally:
+        server.shutdown()
+    print(f'[+] Browserless login succeeded. CSRF token: {session.headers["X-CSRF-TOKEN"]}, cookies: {session.cookies.get_dict()}')
+    return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Serve local stand-in of SSO login pages')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('-u', '--username', type=str, default='user', help='Accepted username')
+    parser.add_argument('-p', '--password', type=str, default='password', help='Accepted password')
+    parser.add_argument('--captcha', action='store_true', help='Show captcha widget on login page')
+    parser.add_argument('--check', action='store_true', help='Replay browserless login against the stand-in and exit')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    server = create_server(args.host, 0 if args.check else args.port, args.username, args.password, args.captcha)
+    if args.check:
+        sys.exit(0 if check_login(server) else 1)
+
+    sso_url, full_offer_url = get_urls(server)
+    print(f'[+] Serving SSO stand-in. Run parser with:\n SSO_URL={sso_url} FULL_OFFER_URL={full_offer_url} LOGIN_BACKEND=http')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,7 @@ import asyncio
 from src.urls import async_get_soup_from_url, get_subcategory_url_from_path
 from src.progress import async_execute_tasks_with_progressbar
 from bs4 import BeautifulSoup
-from typing import List
+from typing import List, Tuple
 from itertools import chain
 
 async def get_subcategories_soup(session: aiohttp.ClientSession, category_id: str) -> BeautifulSoup:
@@ -13,9 +13,10 @@ async def get_subcategories_soup(session: aiohttp.ClientSession, category_id: st
     return soup
 
 
-async def parse_category_URLs(session: aiohttp.ClientSession, category_id: str) -> list:
+def parse_subcategories_from_soup(soup: BeautifulSoup) -> Tuple[List[str], List[str]]:
+    """Returns subcategory URL's and codes of nested categories from a subcategories tree node."""
     URLs = []
-    soup = await get_subcategories_soup(session, category_id)
+    nested_category_ids = []
     for element in soup.find_all('div', class_='categoriestree__subcategory'):
         category_data_code = element.get('data-code')
 
@@ -25,7 +26,16 @@ async def parse_category_URLs(session: aiohttp.ClientSession, category_id: str)
             URLs.append(subcategory_url)
 
         else:
-            URLs += await parse_category_URLs(session, category_data_code)
+            nested_category_ids.append(category_data_code)
+
+    return URLs, nested_category_ids
+
+
+async def parse_category_URLs(session: aiohttp.ClientSession, category_id: str) -> list:
+    soup = await get_subcategories_soup(session, category_id)
+    URLs, nested_category_ids = parse_subcategories_from_soup(soup)
+    for nested_category_id in nested_category_ids:
+        URLs += await parse_category_URLs(session, nested_category_id)
 
     return URLs
 
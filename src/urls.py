@@ -2,6 +2,7 @@ import aiohttp
 import requests
 
 from bs4 import BeautifulSoup, Tag
+from src.rate_limit import create_trace_config
 from urllib.parse import urlparse, parse_qsl, urlencode, unquote
 
 
@@ -61,4 +62,5 @@ async def async_get_soup_from_url(session: aiohttp.ClientSession, url: str) -> B
 
 def create_aiohttp_session(sync_session: requests.Session) -> aiohttp.ClientSession:
     timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=20)
-    return aiohttp.ClientSession(headers=sync_session.headers, cookies=sync_session.cookies.get_dict(), timeout=timeout)
+    return aiohttp.ClientSession(headers=sync_session.headers, cookies=sync_session.cookies.get_dict(), timeout=timeout,
+                                 trace_configs=[create_trace_config()])
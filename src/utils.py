@@ -1,6 +1,6 @@
 import os
 
-from typing import List
+from typing import Iterator, List, Tuple
 
 def get_or_create_dir(dir_path):
     if not os.path.exists(dir_path):
@@ -8,15 +8,21 @@ def get_or_create_dir(dir_path):
     return dir_path
 
 
-def prettify_description(description: str) -> dict:
-    pretty_description = {}
+def split_description(description: str) -> Iterator[Tuple[str, str]]:
+    """Yields `(title, value)` pairs of `title: value | title: value` description. Segments without title are skipped.
+
+    Value keeps everything after the first `:`, so `Вес: 2: 3` gives `2: 3` (it was cut to `2` before).
+    """
     for desc_string in description.split('|'):
-        desc_string = desc_string.strip()
-        desc_items = desc_string.split(':')
-        desc_title = desc_items[0].strip()
-        desc_value = desc_items[1].strip()
-        pretty_description[desc_title] = desc_value
-    return pretty_description
+        desc_title, separator, desc_value = desc_string.partition(':')
+        desc_title = desc_title.strip()
+        if not separator or not desc_title:
+            continue
+        yield desc_title, desc_value.strip()
+
+
+def prettify_description(description: str) -> dict:
+    return dict(split_description(description))
 
 
 def drop_duplicates(l: List[dict], key: str):
@@ -0,0 +1,95 @@
+import csv
+import os
+
+from datetime import datetime
+from typing import Iterable, List
+from src.brands import ITEMS_COUNTER_LIMIT
+from src.models import BrandFilter, FilterCrawl
+from src.settings import LOGS_DIR
+from src.utils import get_or_create_dir
+
+
+COVERAGE_REPORT_FIELDS = ['subcategory_url', 'filters', 'split_filters', 'incomplete_filters',
+                          'expected_items', 'parsed_items', 'coverage', 'capped_brands']
+
+
+def get_incomplete_crawls(crawls: Iterable[FilterCrawl]) -> List[FilterCrawl]:
+    """Returns crawls which parsed less items than expected. Crawls replaced by split ones are skipped."""
+    return [crawl for crawl in crawls if not crawl.children and not crawl.is_complete()]
+
+
+def is_capped(crawl: FilterCrawl) -> bool:
+    return crawl.get_parsed_count() >= ITEMS_COUNTER_LIMIT
+
+
+def is_splittable(crawl: FilterCrawl) -> bool:
+    return len(crawl.brand_filter.brands_list) > 1
+
+
+def is_capped_single_brand(crawl: FilterCrawl) -> bool:
+    """Single brand filter capped by the site can't be split any further, so re-fetching won't get more items."""
+    return not is_splittable(crawl) and is_capped(crawl)
+
+
+def get_crawls_to_refetch(crawls: Iterable[FilterCrawl]) -> List[FilterCrawl]:
+    return [crawl for crawl in get_incomplete_crawls(crawls) if not is_capped_single_brand(crawl)]
+
+
+def should_split(crawl: FilterCrawl) -> bool:
+    # Filter that stays short after re-fetching is split as well, since smaller queries are served more reliably
+    return is_splittable(crawl) and (is_capped(crawl) or crawl.attempts > 0)
+
+
+def split_crawl(crawl: FilterCrawl) -> List[FilterCrawl]:
+    brands_list = crawl.brand_filter.brands_list
+    middle = len(brands_list) // 2
+    crawl.children = [FilterCrawl(crawl.subcategory_url, BrandFilter(brands), parent=crawl)
+                      for brands in (brands_list[:middle], brands_list[middle:])]
+    return crawl.children
+
+
+def get_expected_count(crawl: FilterCrawl) -> int:
+    """Returns items count expected from a filter that wasn't split.
+
+    Complete filter reached its last page, so parsed items are all of them even if brand counters are stale.
+    """
+    if crawl.is_complete():
+        return crawl.get_parsed_count()
+    return max(crawl.get_expected_count(), crawl.get_parsed_count())
+
+
+def build_coverage_report(crawls: Iterable[FilterCrawl]) -> List[dict]:
+    subcategories = {}
+    for crawl in crawls:
+        subcategories.setdefault(crawl.subcategory_url, []).append(crawl)
+
+    report = []
+    for subcategory_url, subcategory_crawls in subcategories.items():
+        expected_count = sum(get_expected_count(crawl) for crawl in subcategory_crawls if not crawl.children)
+        parsed_count = len({item['product_code'] for crawl in subcategory_crawls for item in crawl.get_items()})
+        incomplete_count = len(get_incomplete_crawls(subcategory_crawls))
+        if incomplete_count:
+            # Items are missing, so coverage of subcategory with incomplete filters never reads as full
+            expected_count = max(expected_count, parsed_count + 1)
+        report.append({
+            'subcategory_url': subcategory_url,
+            'filters': len([crawl for crawl in subcategory_crawls if crawl.parent is None]),
+            'split_filters': len([crawl for crawl in subcategory_crawls if crawl.children]),
+            'incomplete_filters': incomplete_count,
+            'expected_items': expected_count,
+            'parsed_items': parsed_count,
+            'coverage': round(parsed_count / expected_count * 100, 2) if expected_count else 100.0,
+            'capped_brands': ' '.join(crawl.brand_filter.get_filter_query() for crawl in subcategory_crawls
+                                      if not crawl.children and is_capped_single_brand(crawl)),
+        })
+    return sorted(report, key=lambda row: row['coverage'])
+
+
+def write_coverage_report(report: List[dict]) -> str:
+    filename = f'coverage_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.csv'
+    filepath = os.path.join(get_or_create_dir(LOGS_DIR), filename)
+    with open(filepath, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=COVERAGE_REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(report)
+    return filepath